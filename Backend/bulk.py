@@ -0,0 +1,234 @@
+"""Streaming bulk export/import of leaderboard and user tables.
+
+Rows are read through a server-side cursor and written out one line at a time,
+so exports run in constant memory regardless of table size. Imports are
+committed in batches (multi-row INSERT, or COPY on Postgres), and every batch
+commit is a checkpoint that an interrupted import can resume from.
+
+Input is split into lines before parsing, so CSV fields must not contain
+newlines (quoted multi-line fields are not supported). Exports never produce
+them for these tables.
+
+Usage:
+    python bulk.py export leaderboard --format csv > leaderboard.csv
+    python bulk.py import leaderboard leaderboard.csv --format csv --checkpoint leaderboard.ckpt
+"""
+from sqlalchemy import Table, Date, DateTime, Integer, Enum as SQLEnum, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Iterable
+from datetime import date, datetime
+import argparse
+import asyncio
+import csv
+import enum
+import io
+import json
+import os
+import sys
+
+from sql_models import Leaderboard, User
+
+TABLES: dict[str, Table] = {
+    "leaderboard": Leaderboard.__table__,
+    "users": User.__table__,
+}
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+EXPORT_CHUNK_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+# Bind parameters per INSERT statement, SQLite's historical default limit
+MAX_BIND_PARAMS = 999
+
+
+def _encode(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decoders(table: Table) -> dict:
+    decoders = {}
+    for column in table.columns:
+        if isinstance(column.type, SQLEnum) and column.type.enum_class is not None:
+            decoders[column.name] = column.type.enum_class
+        elif isinstance(column.type, DateTime):
+            decoders[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            decoders[column.name] = date.fromisoformat
+        elif isinstance(column.type, Integer):
+            decoders[column.name] = int
+        else:
+            decoders[column.name] = str
+    return decoders
+
+
+def _decode_row(raw: dict, decoders: dict) -> dict:
+    row = {}
+    for name, decode in decoders.items():
+        value = raw.get(name)
+        # CSV has no null, an empty field stands for one
+        row[name] = None if value is None or value == "" else decode(value)
+    return row
+
+
+async def export_rows(db: AsyncSession, table_name: str, fmt: str = "ndjson") -> AsyncIterator[str]:
+    """Yield the table as NDJSON or CSV text, one chunk per cursor partition."""
+    table = TABLES[table_name]
+    columns = [c.name for c in table.columns]
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    stmt = select(table).order_by(table.c.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        if fmt == "csv":
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_encode(v) for v in row] for row in partition)
+            yield buffer.getvalue()
+        else:
+            yield "".join(
+                json.dumps({k: _encode(v) for k, v in zip(columns, row)}) + "\n"
+                for row in partition
+            )
+
+
+def _parse_lines(lines: Iterable[str], fmt: str, header: list[str] | None) -> Iterable[dict]:
+    if fmt == "csv":
+        return (dict(zip(header, values)) for values in csv.reader(lines))
+    return (json.loads(line) for line in lines)
+
+
+async def _insert_batch(db: AsyncSession, table: Table, rows: list[dict]):
+    if db.get_bind().dialect.name == "postgresql":
+        # COPY is several times faster than INSERT for bulk loads on Postgres
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        columns = [c.name for c in table.columns]
+        records = [
+            tuple(r[c].name if isinstance(r[c], enum.Enum) else r[c] for c in columns)
+            for r in rows
+        ]
+        await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+    else:
+        # Explicit multi-row INSERT ... VALUES (...), (...), kept under the bind parameter limit
+        per_statement = max(1, MAX_BIND_PARAMS // len(table.columns))
+        for i in range(0, len(rows), per_statement):
+            await db.execute(insert(table).values(rows[i:i + per_statement]))
+
+
+async def import_rows(
+    db: AsyncSession,
+    table_name: str,
+    lines: AsyncIterator[str],
+    fmt: str = "ndjson",
+    skip: int = 0,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_checkpoint=None,
+) -> int:
+    """Insert rows from NDJSON or CSV lines in committed batches.
+
+    Every line is one row, so CSV fields containing newlines are not supported.
+
+    ``skip`` is the number of data rows already imported by a previous run.
+    ``on_checkpoint(n)`` is awaited after each commit with the total number of
+    data rows imported so far; pass it back as ``skip`` to resume. Returns that
+    same total.
+    """
+    table = TABLES[table_name]
+    decoders = _decoders(table)
+    header = None
+    seen = 0
+    pending: list[str] = []
+
+    async def flush():
+        nonlocal pending
+        rows = [_decode_row(raw, decoders) for raw in _parse_lines(pending, fmt, header)]
+        pending = []
+        await _insert_batch(db, table, rows)
+        await db.commit()
+        if on_checkpoint:
+            await on_checkpoint(seen)
+
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = next(csv.reader([line]))
+            continue
+        seen += 1
+        if seen <= skip:
+            continue
+        pending.append(line)
+        if len(pending) >= batch_size:
+            await flush()
+
+    if pending:
+        await flush()
+    return max(seen, skip)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks (e.g. a request body) into text lines."""
+    remainder = b""
+    async for chunk in chunks:
+        remainder += chunk
+        *complete, remainder = remainder.split(b"\n")
+        for line in complete:
+            yield line.decode()
+    if remainder:
+        yield remainder.decode()
+
+
+async def _main(args):
+    from database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if args.command == "export":
+            async for chunk in export_rows(db, args.table, args.format):
+                sys.stdout.write(chunk)
+            return
+
+        skip = 0
+        if args.checkpoint and os.path.exists(args.checkpoint):
+            with open(args.checkpoint) as f:
+                skip = int(f.read().strip() or 0)
+
+        async def save_checkpoint(done: int):
+            if args.checkpoint:
+                with open(args.checkpoint, "w") as f:
+                    f.write(str(done))
+            print(f"imported {done} rows", file=sys.stderr)
+
+        async def read_lines():
+            with open(args.file, newline="") as f:
+                for line in f:
+                    yield line
+
+        await import_rows(db, args.table, read_lines(), args.format, skip=skip,
+                          batch_size=args.batch_size, on_checkpoint=save_checkpoint)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk export/import Snake Arena data")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Write a table to stdout")
+    export_parser.add_argument("table", choices=TABLES)
+    export_parser.add_argument("--format", choices=FORMATS, default="ndjson")
+
+    import_parser = sub.add_parser("import", help="Load a table from a file")
+    import_parser.add_argument("table", choices=TABLES)
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    import_parser.add_argument("--checkpoint", help="File recording progress, used to resume")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    asyncio.run(_main(parser.parse_args()))
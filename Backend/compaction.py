@@ -0,0 +1,150 @@
+"""Leaderboard retention: keep the hot table small.
+
+Rows older than the retention window that are not in the top-K of their
+(mode, month) are moved to ``leaderboard_archive`` and counted in
+``leaderboard_run_counts``. Work is done in small batches, each in its own
+short transaction, so score submissions are never blocked for long.
+
+Once a month lies entirely before the cutoff and has been compacted, it is
+recorded in ``leaderboard_compaction_state`` and later runs start after it,
+rather than rescanning from the oldest (top-K) row still in the table.
+"""
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import logging
+import os
+
+from models import GameMode
+from sql_models import Leaderboard, LeaderboardArchive, LeaderboardCompactionState, LeaderboardRunCount
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_RETENTION_DAYS = int(os.getenv("LEADERBOARD_RETENTION_DAYS", "30"))
+LEADERBOARD_KEEP_TOP = int(os.getenv("LEADERBOARD_KEEP_TOP", "100"))
+LEADERBOARD_COMPACTION_BATCH = int(os.getenv("LEADERBOARD_COMPACTION_BATCH", "500"))
+# Seconds between compaction runs, 0 disables the background task
+LEADERBOARD_COMPACTION_INTERVAL = float(os.getenv("LEADERBOARD_COMPACTION_INTERVAL", "3600"))
+
+
+def _months(first: date, last: date):
+    """Yield (period, start, end) for each month from first to last inclusive."""
+    start = first.replace(day=1)
+    while start <= last:
+        end = (start + timedelta(days=32)).replace(day=1)
+        yield start.strftime("%Y-%m"), start, end
+        start = end
+
+
+def _upsert(db: AsyncSession, model):
+    dialect = db.get_bind().dialect.name
+    return (postgresql_insert if dialect == "postgresql" else sqlite_insert)(model)
+
+
+async def _archive_batch(db: AsyncSession, mode: GameMode, period: str, rows):
+    ids = [r.id for r in rows]
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(LeaderboardArchive), [
+        {"id": r.id, "username": r.username, "score": r.score, "mode": r.mode, "date": r.date, "archived_at": now}
+        for r in rows
+    ])
+    await db.execute(delete(Leaderboard).where(Leaderboard.id.in_(ids)))
+
+    # Atomic upsert so concurrent compactors cannot lose updates or collide on the primary key
+    upsert = _upsert(db, LeaderboardRunCount).values(
+        mode=mode, period=period, runs=len(rows), total_score=sum(r.score or 0 for r in rows)
+    )
+    await db.execute(upsert.on_conflict_do_update(
+        index_elements=[LeaderboardRunCount.mode, LeaderboardRunCount.period],
+        set_={
+            "runs": LeaderboardRunCount.runs + upsert.excluded.runs,
+            "total_score": LeaderboardRunCount.total_score + upsert.excluded.total_score,
+        },
+    ))
+
+
+async def _mark_compacted(db: AsyncSession, mode: GameMode, period: str):
+    upsert = _upsert(db, LeaderboardCompactionState).values(mode=mode, compacted_through=period)
+    await db.execute(upsert.on_conflict_do_update(
+        index_elements=[LeaderboardCompactionState.mode],
+        set_={"compacted_through": upsert.excluded.compacted_through},
+    ))
+
+
+async def compact_leaderboard(
+    session_factory: async_sessionmaker,
+    retention_days: int = LEADERBOARD_RETENTION_DAYS,
+    keep_top: int = LEADERBOARD_KEEP_TOP,
+    batch_size: int = LEADERBOARD_COMPACTION_BATCH,
+    today: date | None = None,
+) -> int:
+    """Archive aged rows outside the top ``keep_top`` per (mode, month). Returns rows archived."""
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    archived = 0
+
+    async with session_factory() as db:
+        oldest = (await db.execute(select(func.min(Leaderboard.date)))).scalar()
+        done = dict((await db.execute(
+            select(LeaderboardCompactionState.mode, LeaderboardCompactionState.compacted_through)
+        )).all())
+    if oldest is None or oldest >= cutoff:
+        return 0
+
+    for mode in GameMode:
+        first = oldest
+        if mode in done:
+            # Resume with the month after the last one fully compacted
+            after = (date.fromisoformat(f"{done[mode]}-01") + timedelta(days=32)).replace(day=1)
+            first = max(first, after)
+        for period, start, end in _months(first, cutoff):
+            async with session_factory() as db:
+                # Top rows are ranked over the whole month, including rows still inside the window
+                keep = (await db.execute(
+                    select(Leaderboard.id)
+                    .where(Leaderboard.mode == mode, Leaderboard.date >= start, Leaderboard.date < end)
+                    .order_by(Leaderboard.score.desc(), Leaderboard.id)
+                    .limit(keep_top)
+                )).scalars().all()
+
+                while True:
+                    rows = (await db.execute(
+                        select(Leaderboard.id, Leaderboard.username, Leaderboard.score, Leaderboard.mode, Leaderboard.date)
+                        .where(
+                            Leaderboard.mode == mode,
+                            Leaderboard.date >= start,
+                            Leaderboard.date < min(end, cutoff),
+                            Leaderboard.id.not_in(keep),
+                        )
+                        .order_by(Leaderboard.id)
+                        .limit(batch_size)
+                    )).all()
+                    if not rows:
+                        break
+
+                    await _archive_batch(db, mode, period, rows)
+                    await db.commit()
+                    archived += len(rows)
+                    # Let request handlers run between batches
+                    await asyncio.sleep(0)
+
+                if end <= cutoff:
+                    # No row of this month can age into the window later, skip it from now on
+                    await _mark_compacted(db, mode, period)
+                    await db.commit()
+
+    return archived
+
+
+async def run_compaction(session_factory: async_sessionmaker, interval: float = LEADERBOARD_COMPACTION_INTERVAL):
+    """Compact the leaderboard every ``interval`` seconds until cancelled."""
+    while True:
+        try:
+            archived = await compact_leaderboard(session_factory)
+            if archived:
+                logger.info("Archived %d leaderboard rows", archived)
+        except Exception:
+            logger.exception("Leaderboard compaction failed")
+        await asyncio.sleep(interval)
@@ -1,21 +1,44 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from fastapi import Depends, Request
+from collections import OrderedDict
 from sql_models import Base, User, Leaderboard, GameMode
+from ratelimit import client_ip
+import hashlib
 import os
+import time
 from datetime import datetime, date
 
 # Default to SQLite, can be overridden by DATABASE_URL env var
 # For SQLite async, use sqlite+aiosqlite:///
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./snake_arena.db")
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
-elif DATABASE_URL.startswith("postgresql://") and "asyncpg" not in DATABASE_URL:
-     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
-
-engine = create_async_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+def _async_url(url: str) -> str:
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://") and "asyncpg" not in url:
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+
+DATABASE_URL = _async_url(os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./snake_arena.db"))
+
+# Optional read replica used by read-only routes through get_read_db
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+if DATABASE_READ_URL:
+    DATABASE_READ_URL = _async_url(DATABASE_READ_URL)
+# Serve reads from the primary when the replica cannot be reached
+DATABASE_READ_FALLBACK = os.getenv("DATABASE_READ_FALLBACK", "1") != "0"
+# After a caller (bearer token, or IP when anonymous) writes, keep its reads on the
+# primary for this long so it sees its own writes despite replica lag. 0 disables.
+DATABASE_READ_AFTER_WRITE_SECONDS = float(os.getenv("DATABASE_READ_AFTER_WRITE_SECONDS", "5"))
+
+engine = _create_engine(DATABASE_URL)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -24,13 +47,58 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
-async def init_db():
-    async with engine.begin() as conn:
+read_engine = _create_engine(DATABASE_READ_URL) if DATABASE_READ_URL else None
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+) if read_engine else None
+
+class RecentWrites:
+    """Remembers which clients committed a write recently (bounded, LRU order)."""
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._last_write: OrderedDict[str, float] = OrderedDict()
+
+    def mark(self, key: str):
+        self._last_write[key] = time.monotonic()
+        self._last_write.move_to_end(key)
+        while len(self._last_write) > self.max_keys:
+            self._last_write.popitem(last=False)
+
+    def wrote_within(self, key: str, seconds: float) -> bool:
+        last_write = self._last_write.get(key)
+        return last_write is not None and time.monotonic() - last_write < seconds
+
+recent_writes = RecentWrites()
+
+@event.listens_for(Session, "after_commit")
+def _track_commit(session):
+    client_key = session.info.get("client_key")
+    if client_key:
+        recent_writes.mark(client_key)
+
+def token_key(token: str) -> str:
+    # Hashed so bearer tokens are not kept in memory as-is
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+def caller_key(request: Request) -> str:
+    """Identify the caller for read-your-writes: bearer token, else client IP."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token_key(token)
+    return "ip:" + client_ip(request)
+
+async def _create_and_seed(db_engine, session_factory):
+    async with db_engine.begin() as conn:
         # Create tables
         await conn.run_sync(Base.metadata.create_all)
     
     # Seed data if empty
-    async with AsyncSessionLocal() as session:
+    async with session_factory() as session:
         # Check if users exist
         from sqlalchemy import select
         result = await session.execute(select(User))
@@ -57,9 +125,44 @@ async def init_db():
             session.add_all(entries)
             await session.commit()
 
+async def init_db():
+    await _create_and_seed(engine, AsyncSessionLocal)
+    
+    # A real replica gets its schema and data through replication. A local SQLite
+    # "replica" file (for trying read routing out) has to be prepared the same way
+    # as the primary, otherwise every read fails with "no such table".
+    if read_engine is not None and read_engine.dialect.name == "sqlite":
+        await _create_and_seed(read_engine, AsyncReadSessionLocal)
+
 # Dependency for FastAPI
-async def get_db():
+async def get_db(request: Request):
     async with AsyncSessionLocal() as session:
+        session.info["client_key"] = caller_key(request)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+# Dependency for read-only routes. Uses the replica when one is configured,
+# otherwise (or when the client wrote recently) the primary session.
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_db)):
+    if (
+        AsyncReadSessionLocal is None
+        or recent_writes.wrote_within(caller_key(request), DATABASE_READ_AFTER_WRITE_SECONDS)
+    ):
+        yield primary
+        return
+
+    async with AsyncReadSessionLocal() as session:
+        try:
+            # Connect eagerly so an unreachable replica can fall back before the route runs
+            await session.connection()
+        except (DBAPIError, OSError):
+            if not DATABASE_READ_FALLBACK:
+                raise
+            await session.close()
+            yield primary
+            return
         try:
             yield session
         finally:
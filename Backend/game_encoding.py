@@ -0,0 +1,138 @@
+"""Compact encodings of ActivePlayer for spectator traffic.
+
+A snake is sent as a byte array of cell indices (``y * GRID_SIZE + x``), two
+bytes per cell since a 20x20 board has 400 cells, instead of a JSON list of
+``{"x": .., "y": ..}`` objects.
+
+Packed layout (little-endian), used for PACKED_MEDIA_TYPE:
+    u16 player count, then per player:
+    u8 id length, id (utf-8), u8 username length, username (utf-8),
+    i32 score, u8 mode, u8 direction, u16 food cell,
+    u16 snake length, u16 cell per snake segment
+
+Modes and directions are indices into the GameMode / Direction enums.
+These definitions are shared with snapshot.py.
+"""
+from typing import List
+import logging
+import struct
+
+import msgpack
+
+from models import ActivePlayer, Direction, GameMode, Point, GRID_SIZE
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+PACKED_MEDIA_TYPE = "application/x-snake-packed"
+
+logger = logging.getLogger(__name__)
+
+MODES = list(GameMode)
+DIRECTIONS = list(Direction)
+
+# A snake can at most fill the board
+MAX_SNAKE_LENGTH = GRID_SIZE * GRID_SIZE
+# Length prefix of ids and usernames in the packed form is one byte
+MAX_PACKED_TEXT = 255
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+
+_FIXED = struct.Struct("<iBBHH")
+
+
+def cell(point: Point) -> int:
+    return point.y * GRID_SIZE + point.x
+
+
+def point(cell_index: int) -> Point:
+    return Point(x=cell_index % GRID_SIZE, y=cell_index // GRID_SIZE)
+
+
+def pack_snake(snake: List[Point]) -> bytes:
+    return struct.pack(f"<{len(snake)}H", *[p.y * GRID_SIZE + p.x for p in snake])
+
+
+def unpack_snake(data: bytes) -> List[Point]:
+    return [point(c) for c in struct.unpack(f"<{len(data) // 2}H", data)]
+
+
+def invalid_reason(p: ActivePlayer, max_text: int = MAX_PACKED_TEXT) -> str | None:
+    """Why ``p`` cannot be encoded compactly without losing data, or None if it can."""
+    if len(p.id.encode()) > max_text or len(p.username.encode()) > max_text:
+        return f"id or username longer than {max_text} bytes"
+    if not INT32_MIN <= p.score <= INT32_MAX:
+        return "score outside int32"
+    if len(p.snake) > MAX_SNAKE_LENGTH:
+        return f"snake longer than {MAX_SNAKE_LENGTH}"
+    if any(not (0 <= pt.x < GRID_SIZE and 0 <= pt.y < GRID_SIZE) for pt in (p.food, *p.snake)):
+        return "point outside the board"
+    return None
+
+
+def encodable(players: List[ActivePlayer], max_text: int = MAX_PACKED_TEXT) -> List[ActivePlayer]:
+    """Drop (and log) players that cannot be encoded compactly."""
+    kept = []
+    for p in players:
+        reason = invalid_reason(p, max_text)
+        if reason:
+            logger.warning("Skipping game %r in compact encoding: %s", p.id, reason)
+            continue
+        kept.append(p)
+    return kept
+
+
+def _short_text(value: str) -> bytes:
+    data = value.encode()
+    if len(data) > MAX_PACKED_TEXT:
+        raise ValueError(f"{value!r} is longer than {MAX_PACKED_TEXT} bytes")
+    return bytes([len(data)]) + data
+
+
+def encode_packed(players: List[ActivePlayer]) -> bytes:
+    """Encode players, all of which must pass invalid_reason (see encodable)."""
+    out = bytearray(struct.pack("<H", len(players)))
+    for p in players:
+        out += _short_text(p.id)
+        out += _short_text(p.username)
+        out += _FIXED.pack(p.score, MODES.index(p.mode), DIRECTIONS.index(p.direction),
+                           cell(p.food), len(p.snake))
+        out += pack_snake(p.snake)
+    return bytes(out)
+
+
+def decode_packed(data: bytes) -> List[ActivePlayer]:
+    (count,) = struct.unpack_from("<H", data, 0)
+    offset = 2
+    players = []
+    for _ in range(count):
+        texts = []
+        for _ in range(2):
+            length = data[offset]
+            texts.append(data[offset + 1:offset + 1 + length].decode())
+            offset += 1 + length
+        score, mode, direction, food, snake_length = _FIXED.unpack_from(data, offset)
+        offset += _FIXED.size
+        snake = unpack_snake(data[offset:offset + snake_length * 2])
+        offset += snake_length * 2
+        players.append(ActivePlayer(
+            id=texts[0], username=texts[1], score=score, mode=MODES[mode],
+            snake=snake, food=point(food), direction=DIRECTIONS[direction],
+        ))
+    return players
+
+
+def _msgpack_player(p: ActivePlayer) -> dict:
+    # Same fields as the JSON form, but snake is a bin of packed cells and food a cell index
+    return {
+        "id": p.id,
+        "username": p.username,
+        "score": p.score,
+        "mode": p.mode.value,
+        "snake": pack_snake(p.snake),
+        "food": cell(p.food),
+        "direction": p.direction.value,
+    }
+
+
+def encode_msgpack(players: List[ActivePlayer], single: bool = False) -> bytes:
+    if single:
+        return msgpack.packb(_msgpack_player(players[0]))
+    return msgpack.packb([_msgpack_player(p) for p in players])
@@ -1,14 +1,49 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, leaderboard, games
+from fastapi.middleware.gzip import GZipMiddleware
+from routers import auth, leaderboard, games, admin
 
 from contextlib import asynccontextmanager
-from database import init_db
+import asyncio
+import os
+from database import init_db, AsyncSessionLocal
+from compaction import run_compaction, LEADERBOARD_COMPACTION_INTERVAL
+from ratelimit import ConcurrencyLimitMiddleware, rejection_counts
+from snapshot import GameSnapshotter, GAME_SNAPSHOT_PATH
+
+async def _stop(task: asyncio.Task):
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
-    yield
+
+    tasks = []
+    if LEADERBOARD_COMPACTION_INTERVAL > 0:
+        tasks.append(asyncio.create_task(run_compaction(AsyncSessionLocal)))
+
+    snapshotter = None
+    if GAME_SNAPSHOT_PATH:
+        # Restore live games from the last snapshot, then keep snapshotting in the background
+        snapshotter = GameSnapshotter(GAME_SNAPSHOT_PATH)
+        snapshotter.open()
+        restored = snapshotter.read()
+        if restored:
+            games.active_players_memory[:] = restored
+        tasks.append(asyncio.create_task(snapshotter.run(lambda: games.active_players_memory)))
+
+    try:
+        yield
+    finally:
+        for task in tasks:
+            await _stop(task)
+        if snapshotter:
+            snapshotter.write(games.active_players_memory)
+            snapshotter.close()
 
 app = FastAPI(
     title="Snake Arena API",
@@ -26,14 +61,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses (e.g. /games/active for JSON spectators) once they are worth it
+app.add_middleware(GZipMiddleware, minimum_size=int(os.getenv("GZIP_MINIMUM_SIZE", "1000")))
+
+# Added last so it runs outermost and sheds load before any other work is done
+app.add_middleware(ConcurrencyLimitMiddleware)
+
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-import os
 
 # Include Routers
 app.include_router(auth.router)
 app.include_router(leaderboard.router)
 app.include_router(games.router)
+app.include_router(admin.router)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return {"rate_limit_rejections": dict(rejection_counts)}
 
 # Mount static files (JS, CSS, images)
 # We check if directory exists to avoid errors in dev mode without build
@@ -3,6 +3,9 @@ from typing import List, Optional
 from datetime import date, datetime
 from enum import Enum
 
+# Board is GRID_SIZE x GRID_SIZE cells, matching the frontend
+GRID_SIZE = 20
+
 class GameMode(str, Enum):
     PASS_THROUGH = "pass-through"
     WALLS = "walls"
@@ -0,0 +1,209 @@
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from collections import Counter, OrderedDict
+import ipaddress
+import math
+import os
+import time
+
+# Rate limiting can be switched off entirely (e.g. for load tests) with RATE_LIMIT_ENABLED=0
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+# Max in-flight HTTP requests before the server sheds load with 503. 0 disables the limit.
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "256"))
+
+# Comma separated IPs/CIDRs of reverse proxies whose X-Forwarded-For is trusted,
+# e.g. "10.0.0.0/8". "*" trusts whichever peer connects (a single proxy hop in
+# front of the app, as on most PaaS routers). Empty uses the socket peer address.
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()]
+
+# Rejections per limiter name, exposed via GET /metrics
+rejection_counts: Counter = Counter()
+
+# Every limiter, so tests can reset them all
+limiters: list["TokenBucketLimiter"] = []
+
+
+def _is_trusted(host: str, trusted: list[str]) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    for entry in trusted:
+        try:
+            if address in ipaddress.ip_network(entry, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def client_ip(request: Request, trusted: list[str] | None = None) -> str:
+    """Best guess at the real client address.
+
+    X-Forwarded-For is only honoured when the direct peer is a trusted proxy.
+    It is then walked from the right, skipping trusted proxies, so a client
+    cannot spoof its address by sending the header itself.
+    """
+    if trusted is None:
+        trusted = TRUSTED_PROXIES
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not trusted or not forwarded:
+        return peer
+
+    hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+    if "*" in trusted:
+        return hops[-1] if hops else peer
+    if not _is_trusted(peer, trusted):
+        return peer
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return hops[0] if hops else peer
+
+
+def reset_limiters():
+    for limiter in limiters:
+        limiter.reset()
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by client (IP, user id, ...).
+
+    Buckets live in an OrderedDict kept in least-recently-used order, so a
+    hit, an insert and an eviction are all O(1). Memory is bounded by
+    ``max_keys`` and buckets idle for longer than ``idle_ttl`` seconds are
+    dropped as new requests come in.
+    """
+
+    def __init__(self, name: str, capacity: int, refill_rate: float,
+                 max_keys: int = 10_000, idle_ttl: float = 600.0):
+        self.name = name
+        self.capacity = capacity
+        self.refill_rate = refill_rate  # tokens per second
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        limiters.append(self)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float):
+        while self._buckets:
+            _, (_, last_seen) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - last_seen < self.idle_ttl:
+                break
+            self._buckets.popitem(last=False)
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take one token for ``key``.
+
+        Returns 0 when the request is allowed, otherwise the number of
+        seconds until a token becomes available.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(self.capacity), now]
+            self._buckets[key] = bucket
+        else:
+            tokens, last_seen = bucket
+            bucket[0] = min(self.capacity, tokens + (now - last_seen) * self.refill_rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        self._evict(now)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+
+        rejection_counts[self.name] += 1
+        return (1 - bucket[0]) / self.refill_rate
+
+    def check(self, key: str):
+        """Raise 429 if ``key`` has exhausted its bucket."""
+        if not RATE_LIMIT_ENABLED:
+            return
+        retry_after = self.acquire(key)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    def reset(self):
+        self._buckets.clear()
+
+    async def __call__(self, request: Request):
+        # Used directly as a route dependency, keyed by client IP.
+        # Behind a proxy, set TRUSTED_PROXIES so this is the real client.
+        self.check(client_ip(request))
+
+
+class ConcurrencyLimiter:
+    """Per-route cap on requests in flight, used as a route dependency.
+
+    Requests over ``max_concurrent`` are shed with 503 straight away. The slot
+    is held until the response has been sent.
+    """
+
+    def __init__(self, name: str, max_concurrent: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+
+    async def __call__(self):
+        if self.in_flight >= self.max_concurrent:
+            rejection_counts[self.name] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+
+class ConcurrencyLimitMiddleware:
+    """Shed load with 503 once ``max_concurrent`` HTTP requests are in flight.
+
+    This is the process-wide backstop. Routes with expensive handlers add their
+    own tighter ConcurrencyLimiter.
+
+    Requests are rejected straight away instead of queueing, so the event loop
+    never builds up a backlog it cannot drain.
+    """
+
+    def __init__(self, app, max_concurrent: int = MAX_CONCURRENT_REQUESTS):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_concurrent <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_concurrent:
+            rejection_counts["concurrency"] += 1
+            response = JSONResponse(
+                {"detail": "Server is busy, try again shortly"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
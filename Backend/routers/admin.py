@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
+
+from models import User as UserSchema
+from database import get_db
+from bulk import TABLES, MEDIA_TYPES, export_rows, import_rows, iter_lines
+from .auth import get_current_user
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# Comma separated list of usernames allowed to use the admin endpoints
+ADMIN_USERNAMES = {u.strip() for u in os.getenv("ADMIN_USERNAMES", "").split(",") if u.strip()}
+
+TableName = Literal["leaderboard", "users"]
+ExportFormat = Literal["ndjson", "csv"]
+
+async def require_admin(current_user: Annotated[UserSchema, Depends(get_current_user)]) -> UserSchema:
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+@router.get("/export/{table}", dependencies=[Depends(require_admin)])
+async def export_table(
+    table: TableName,
+    format: ExportFormat = "ndjson",
+    db: AsyncSession = Depends(get_db)
+):
+    return StreamingResponse(
+        export_rows(db, table, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+@router.post("/import/{table}", dependencies=[Depends(require_admin)])
+async def import_table(
+    table: TableName,
+    request: Request,
+    format: ExportFormat = "ndjson",
+    skip: int = 0,
+    db: AsyncSession = Depends(get_db)
+):
+    # The body is consumed as a stream, so uploads never need to fit in memory.
+    # On failure, "imported" tells the client which ?skip= to resume from.
+    imported = skip
+
+    async def record_checkpoint(done: int):
+        nonlocal imported
+        imported = done
+
+    try:
+        imported = await import_rows(db, table, iter_lines(request.stream()), format,
+                                     skip=skip, on_checkpoint=record_checkpoint)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Import failed after {imported} rows: {e}",
+            headers={"X-Import-Checkpoint": str(imported)},
+        )
+
+    return {"table": table, "imported": imported}
@@ -4,28 +4,54 @@ from typing import Annotated
 from datetime import datetime, timezone
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
 
 from models import LoginRequest, UserCreate, AuthResponse, ErrorResponse
 from models import User as UserSchema
 from sql_models import User as UserModel
-from database import get_db
+from database import get_db, get_read_db, token_key
+from ratelimit import TokenBucketLimiter, ConcurrencyLimiter
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 security = HTTPBearer()
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+# Signup and login both run Argon2, so keep per-IP bursts small
+signup_limiter = TokenBucketLimiter("auth_signup", capacity=10, refill_rate=10 / 60)
+login_limiter = TokenBucketLimiter("auth_login", capacity=10, refill_rate=10 / 60)
+# Argon2 is CPU bound, cap how many hashes run at once across all clients
+password_hashing_limiter = ConcurrencyLimiter("auth_password_hashing", max_concurrent=8)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: AsyncSession = Depends(get_db)
-) -> UserSchema:
+# Unique constraints on users, by name (Postgres) and by column (SQLite message)
+UNIQUE_CONSTRAINTS = {
+    "ix_users_email": "email",
+    "ix_users_username": "username",
+    "users.email": "email",
+    "users.username": "username",
+}
+
+def _unique_violation_field(error: IntegrityError):
+    """Return the users column behind a unique violation, or None if it is something else."""
+    # asyncpg: the driver exception carries the constraint name
+    constraint = getattr(error.orig.__cause__, "constraint_name", None)
+    if constraint:
+        return UNIQUE_CONSTRAINTS.get(constraint)
+    # SQLite: "UNIQUE constraint failed: users.email"
+    message = str(error.orig)
+    prefix = "UNIQUE constraint failed: "
+    if message.startswith(prefix):
+        return UNIQUE_CONSTRAINTS.get(message[len(prefix):].strip())
+    return None
+
+async def _load_user(credentials: HTTPAuthorizationCredentials, db: AsyncSession) -> UserSchema:
     token = credentials.credentials
     # Simple mock token: "mock-token-{user_id}"
     if not token.startswith("mock-token-"):
@@ -56,48 +82,77 @@ async def get_current_user(
         createdAt=user.created_at
     )
 
-@router.post("/signup", response_model=AuthResponse, status_code=201, responses={400: {"model": ErrorResponse}})
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: AsyncSession = Depends(get_db)
+) -> UserSchema:
+    # Primary session: write routes must not depend on the replica being up to date
+    return await _load_user(credentials, db)
+
+async def get_current_user_read(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: AsyncSession = Depends(get_read_db)
+) -> UserSchema:
+    # Same lookup on the read replica, for read-only routes
+    return await _load_user(credentials, db)
+
+@router.post("/signup", response_model=AuthResponse, status_code=201, responses={400: {"model": ErrorResponse}, 429: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}, dependencies=[Depends(signup_limiter), Depends(password_hashing_limiter)])
 async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
-    # Check email
-    result = await db.execute(select(UserModel).where(UserModel.email == user_data.email))
-    if result.scalars().first():
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Check username
-    result = await db.execute(select(UserModel).where(UserModel.username == user_data.username))
-    if result.scalars().first():
-        raise HTTPException(status_code=400, detail="Username already taken")
-    
     hashed_password = get_password_hash(user_data.password)
     
     new_user_id = str(uuid.uuid4())
-    new_user = UserModel(
-        id=new_user_id,
-        username=user_data.username,
-        email=user_data.email,
-        password=hashed_password,
-        high_score=0,
-        created_at=datetime.now(timezone.utc)
-    )
+    token = f"mock-token-{new_user_id}"
+    created_at = datetime.now(timezone.utc)
     
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    # The caller has no token yet, attribute the write to the one it is about to get
+    # so its first reads are served from the primary
+    db.info["client_key"] = token_key(token)
     
+    # Single INSERT, the unique indexes on email and username reject duplicates
+    try:
+        await db.execute(insert(UserModel).values(
+            id=new_user_id,
+            username=user_data.username,
+            email=user_data.email,
+            password=hashed_password,
+            high_score=0,
+            created_at=created_at
+        ))
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        field = _unique_violation_field(e)
+        if field == "email":
+            raise HTTPException(status_code=400, detail="Email already registered")
+        if field == "username":
+            raise HTTPException(status_code=400, detail="Username already taken")
+        raise
+    
+    # Everything is known locally, no need to read the row back
     user_schema = UserSchema(
-        id=new_user.id,
-        username=new_user.username,
-        email=new_user.email,
-        highScore=new_user.high_score,
-        createdAt=new_user.created_at
+        id=new_user_id,
+        username=user_data.username,
+        email=user_data.email,
+        highScore=0,
+        createdAt=created_at
     )
     
-    return AuthResponse(user=user_schema, token=f"mock-token-{new_user_id}")
+    return AuthResponse(user=user_schema, token=token)
 
-@router.post("/login", response_model=AuthResponse, responses={401: {"model": ErrorResponse}})
+@router.post("/login", response_model=AuthResponse, responses={401: {"model": ErrorResponse}, 429: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}, dependencies=[Depends(login_limiter), Depends(password_hashing_limiter)])
 async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(UserModel).where(UserModel.email == credentials.email))
-    user = result.scalars().first()
+    # Plain row of the needed columns, no ORM object
+    result = await db.execute(
+        select(
+            UserModel.id,
+            UserModel.username,
+            UserModel.email,
+            UserModel.password,
+            UserModel.high_score,
+            UserModel.created_at
+        ).where(UserModel.email == credentials.email)
+    )
+    user = result.first()
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -120,5 +175,5 @@ async def logout(current_user: Annotated[UserSchema, Depends(get_current_user)])
     return {"message": "Logout successful"}
 
 @router.get("/me", response_model=UserSchema)
-async def get_me(current_user: Annotated[UserSchema, Depends(get_current_user)]):
+async def get_me(current_user: Annotated[UserSchema, Depends(get_current_user_read)]):
     return current_user
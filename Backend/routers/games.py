@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from typing import List
 
 from models import ActivePlayer, GameMode, Point, Direction
@@ -10,6 +12,7 @@ from models import ActivePlayer, GameMode, Point, Direction
 
 # Reusing the singleton logic for active games only
 from database import get_db
+from game_encoding import MSGPACK_MEDIA_TYPE, PACKED_MEDIA_TYPE, encodable, encode_msgpack, encode_packed
 
 router = APIRouter(prefix="/games", tags=["Games"])
 
@@ -35,15 +38,86 @@ active_players_memory = [
     ),
 ]
 
-@router.get("/active", response_model=List[ActivePlayer])
-async def get_active_players():
-    return active_players_memory
+# Alternative representations offered alongside JSON, see game_encoding.py
+COMPACT_RESPONSES = {
+    200: {
+        "content": {
+            MSGPACK_MEDIA_TYPE: {},
+            PACKED_MEDIA_TYPE: {},
+        }
+    }
+}
 
-@router.get("/active/{player_id}", response_model=ActivePlayer)
-async def watch_player(player_id: str):
+# In order of preference when the client rates several equally
+OFFERED_MEDIA_TYPES = ["application/json", PACKED_MEDIA_TYPE, MSGPACK_MEDIA_TYPE]
+
+def _quality(accept: str, media_type: str) -> float:
+    """q-value the Accept header gives media_type, using the most specific matching range."""
+    main_type = media_type.split("/")[0]
+    best = None  # (specificity, q)
+    for entry in accept.split(","):
+        parts = [p.strip() for p in entry.split(";")]
+        range_ = parts[0].lower()
+        if range_ == media_type:
+            specificity = 2
+        elif range_ == f"{main_type}/*":
+            specificity = 1
+        elif range_ == "*/*":
+            specificity = 0
+        else:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if best is None or specificity > best[0]:
+            best = (specificity, q)
+    return best[1] if best else 0.0
+
+def best_media_type(accept: str) -> str:
+    if not accept.strip():
+        return OFFERED_MEDIA_TYPES[0]
+    (q, _), media_type = max(
+        ((_quality(accept, m), -i), m) for i, m in enumerate(OFFERED_MEDIA_TYPES)
+    )
+    # Nothing acceptable: answer with JSON rather than 406, as before negotiation existed
+    return media_type if q > 0 else OFFERED_MEDIA_TYPES[0]
+
+def negotiate(request: Request, players: List[ActivePlayer], single: bool = False) -> Response:
+    media_type = best_media_type(request.headers.get("accept", ""))
+    headers = {"Vary": "Accept"}
+
+    if media_type != "application/json":
+        compact = encodable(players)
+        if single and not compact:
+            # The one player cannot be encoded compactly, JSON can carry anything
+            media_type = "application/json"
+        else:
+            players = compact
+
+    if media_type == PACKED_MEDIA_TYPE:
+        # Always a list, a single player is a list of one
+        return Response(encode_packed(players), media_type=PACKED_MEDIA_TYPE, headers=headers)
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return Response(encode_msgpack(players, single=single), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+
+    content = jsonable_encoder(players[0] if single else players)
+    return JSONResponse(content, headers=headers)
+
+@router.get("/active", response_model=List[ActivePlayer], responses=COMPACT_RESPONSES)
+async def get_active_players(request: Request):
+    return negotiate(request, active_players_memory)
+
+@router.get("/active/{player_id}", response_model=ActivePlayer, responses=COMPACT_RESPONSES)
+async def watch_player(player_id: str, request: Request):
     player = next((p for p in active_players_memory if p.id == player_id), None)
     
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
     
-    return player
+    return negotiate(request, [player], single=True)
@@ -10,16 +10,25 @@ from models import SubmitScoreRequest, GameMode
 from models import User as UserSchema
 from sql_models import Leaderboard as LeaderboardModel
 from sql_models import User as UserModel
-from database import get_db
+from database import get_db, get_read_db
+from ratelimit import TokenBucketLimiter, ConcurrencyLimiter
 from .auth import get_current_user
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
+# A game takes a while to play, so a burst of submissions is suspicious
+submit_ip_limiter = TokenBucketLimiter("submit_score_ip", capacity=60, refill_rate=1)
+submit_user_limiter = TokenBucketLimiter("submit_score_user", capacity=20, refill_rate=1 / 5)
+submit_concurrency_limiter = ConcurrencyLimiter("submit_score_concurrency", max_concurrent=32)
+
+async def limit_submissions_per_user(current_user: Annotated[UserSchema, Depends(get_current_user)]):
+    submit_user_limiter.check(current_user.id)
+
 @router.get("/", response_model=List[LeaderboardEntry])
 async def get_leaderboard(
     mode: Optional[GameMode] = None, 
     limit: int = 10,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     query = select(LeaderboardModel).order_by(desc(LeaderboardModel.score)).limit(limit)
     if mode:
@@ -39,7 +48,7 @@ async def get_leaderboard(
         ) for e in entries
     ]
 
-@router.post("/", response_model=LeaderboardEntry, status_code=201)
+@router.post("/", response_model=LeaderboardEntry, status_code=201, dependencies=[Depends(submit_concurrency_limiter), Depends(submit_ip_limiter), Depends(limit_submissions_per_user)])
 async def submit_score(
     score_data: SubmitScoreRequest, 
     current_user: Annotated[UserSchema, Depends(get_current_user)],
@@ -57,10 +66,11 @@ async def submit_score(
     
     # Update high score if greater
     if score_data.score > current_user.highScore:
-        # Fetch actual user model to update
+        # Fetch actual user model to update. Compare again in case a concurrent
+        # submission already raised the high score.
         result = await db.execute(select(UserModel).where(UserModel.id == current_user.id))
         user_model = result.scalars().first()
-        if user_model:
+        if user_model and score_data.score > user_model.high_score:
             user_model.high_score = score_data.score
             db.add(user_model)
             
@@ -0,0 +1,183 @@
+"""Crash-safe snapshots of live games in a memory-mapped file.
+
+The file holds a small header followed by two slots. Each snapshot is written
+to the slot not holding the latest one, as fixed-width records, and is only
+considered valid once its checksum matches. A crash mid-write therefore leaves
+the previous snapshot intact. Dirty pages survive a process crash in the page
+cache; they are additionally flushed to disk from a worker thread.
+"""
+from typing import Callable, List
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import zlib
+
+from game_encoding import DIRECTIONS, MAX_SNAKE_LENGTH, MODES, cell, invalid_reason, pack_snake, point, unpack_snake
+from models import ActivePlayer
+
+logger = logging.getLogger(__name__)
+
+# Empty path disables snapshotting
+GAME_SNAPSHOT_PATH = os.getenv("GAME_SNAPSHOT_PATH", "game_snapshot.bin")
+GAME_SNAPSHOT_INTERVAL = float(os.getenv("GAME_SNAPSHOT_INTERVAL", "1.0"))
+GAME_SNAPSHOT_MAX_GAMES = int(os.getenv("GAME_SNAPSHOT_MAX_GAMES", "256"))
+
+MAGIC = b"SNAKSNAP"
+VERSION = 3
+# Fits a uuid4 user id (36 chars) and typical usernames, longer values are not snapshotted
+TEXT_SIZE = 64
+
+# magic, version, max games per slot
+FILE_HEADER = struct.Struct("<8sHI")
+# sequence number, game count, crc32 of the records
+SLOT_HEADER = struct.Struct("<QII")
+# id, username, score, mode, direction, food cell, snake length, snake as u16 cells
+# (cells, modes and directions as in game_encoding)
+RECORD = struct.Struct(f"<{TEXT_SIZE}s{TEXT_SIZE}siBBHH{MAX_SNAKE_LENGTH * 2}s")
+
+
+def _untext(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
+
+
+class GameSnapshotter:
+    def __init__(self, path: str, max_games: int = GAME_SNAPSHOT_MAX_GAMES):
+        self.path = path
+        self.max_games = max_games
+        self.slot_size = SLOT_HEADER.size + max_games * RECORD.size
+        self.size = FILE_HEADER.size + 2 * self.slot_size
+        self._mmap: mmap.mmap | None = None
+        self._seq = 0
+        self._slot = 0
+
+    def open(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fresh = os.fstat(fd).st_size != self.size
+            if fresh:
+                os.ftruncate(fd, self.size)
+            self._mmap = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+        magic, version, max_games = FILE_HEADER.unpack_from(self._mmap, 0)
+        if fresh or magic != MAGIC or version != VERSION or max_games != self.max_games:
+            # Different layout, start over rather than misread it
+            self._mmap[:] = bytes(self.size)
+            FILE_HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, self.max_games)
+            return
+
+        latest = self._latest_slot()
+        if latest is not None:
+            self._slot, self._seq = latest
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+
+    def _slot_offset(self, slot: int) -> int:
+        return FILE_HEADER.size + slot * self.slot_size
+
+    def _valid_slot(self, slot: int) -> tuple[int, int] | None:
+        """Return (seq, count) if the slot holds a complete snapshot."""
+        offset = self._slot_offset(slot)
+        seq, count, crc = SLOT_HEADER.unpack_from(self._mmap, offset)
+        if seq == 0 or count > self.max_games:
+            return None
+        start = offset + SLOT_HEADER.size
+        if zlib.crc32(memoryview(self._mmap)[start:start + count * RECORD.size]) != crc:
+            return None
+        return seq, count
+
+    def _latest_slot(self) -> tuple[int, int] | None:
+        """Return (slot, seq) of the newest valid snapshot."""
+        candidates = []
+        for slot in (0, 1):
+            valid = self._valid_slot(slot)
+            if valid:
+                candidates.append((valid[0], slot))
+        if not candidates:
+            return None
+        seq, slot = max(candidates)
+        return slot, seq
+
+    def write(self, players: List[ActivePlayer]):
+        """Snapshot ``players`` into the inactive slot.
+
+        Games past max_games, or that do not fit a record (long id or
+        username, out of range score, points off the board), are left out with
+        a warning rather than truncated, so one bad game never blocks the rest.
+        """
+        records = []
+        for p in players:
+            reason = invalid_reason(p, TEXT_SIZE)
+            if reason:
+                logger.warning("Not snapshotting game %r: %s", p.id, reason)
+                continue
+            records.append(p)
+        if len(records) > self.max_games:
+            logger.warning("Snapshotting %d of %d games", self.max_games, len(records))
+            records = records[:self.max_games]
+
+        slot = 1 - self._slot
+        offset = self._slot_offset(slot)
+        start = offset + SLOT_HEADER.size
+
+        # Invalidate the slot first so a torn write can never look complete
+        SLOT_HEADER.pack_into(self._mmap, offset, 0, 0, 0)
+
+        for i, p in enumerate(records):
+            RECORD.pack_into(
+                self._mmap, start + i * RECORD.size,
+                p.id.encode(), p.username.encode(), p.score,
+                MODES.index(p.mode), DIRECTIONS.index(p.direction),
+                cell(p.food), len(p.snake), pack_snake(p.snake),
+            )
+
+        crc = zlib.crc32(memoryview(self._mmap)[start:start + len(records) * RECORD.size])
+        self._seq += 1
+        SLOT_HEADER.pack_into(self._mmap, offset, self._seq, len(records), crc)
+        self._slot = slot
+
+    def read(self) -> List[ActivePlayer]:
+        """Return the games in the newest valid snapshot, or an empty list."""
+        latest = self._latest_slot()
+        if latest is None:
+            return []
+        slot, _ = latest
+        offset = self._slot_offset(slot)
+        _, count, _ = SLOT_HEADER.unpack_from(self._mmap, offset)
+        start = offset + SLOT_HEADER.size
+
+        players = []
+        for i in range(count):
+            (id_, username, score, mode, direction,
+             food, length, cells) = RECORD.unpack_from(self._mmap, start + i * RECORD.size)
+            players.append(ActivePlayer(
+                id=_untext(id_),
+                username=_untext(username),
+                score=score,
+                mode=MODES[mode],
+                snake=unpack_snake(cells[:length * 2]),
+                food=point(food),
+                direction=DIRECTIONS[direction],
+            ))
+        return players
+
+    async def run(self, get_players: Callable[[], List[ActivePlayer]], interval: float = GAME_SNAPSHOT_INTERVAL):
+        """Snapshot periodically until cancelled.
+
+        Packing runs on the event loop (a few microseconds per game), the
+        msync to disk runs in a worker thread so it never stalls requests.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write(get_players())
+                await asyncio.to_thread(self._mmap.flush)
+            except Exception:
+                logger.exception("Game snapshot failed")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Float, Enum as SQLEnum, DateTime
+from sqlalchemy import Column, BigInteger, Integer, String, Date, Float, Enum as SQLEnum, DateTime, Index
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime, date
 import uuid
@@ -29,3 +29,34 @@ class Leaderboard(Base):
     score = Column(Integer)
     mode = Column(SQLEnum(GameMode))
     date = Column(Date, default=date.today)
+
+    # Covers compaction's per (mode, month) range scans and its top-K ordering
+    __table_args__ = (Index("ix_leaderboard_mode_date_score", "mode", "date", "score"),)
+
+class LeaderboardArchive(Base):
+    """Leaderboard rows moved out of the hot table by compaction.py."""
+    __tablename__ = "leaderboard_archive"
+
+    id = Column(String, primary_key=True)
+    username = Column(String, index=True)
+    score = Column(Integer)
+    mode = Column(SQLEnum(GameMode))
+    date = Column(Date)
+    archived_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class LeaderboardRunCount(Base):
+    """Number of runs (and their total score) compacted out of the leaderboard, per mode and month."""
+    __tablename__ = "leaderboard_run_counts"
+
+    mode = Column(SQLEnum(GameMode), primary_key=True)
+    period = Column(String, primary_key=True)  # "YYYY-MM"
+    # Running totals over every compaction, can outgrow int4
+    runs = Column(BigInteger, default=0)
+    total_score = Column(BigInteger, default=0)
+
+class LeaderboardCompactionState(Base):
+    """Last month whose aged rows have all been compacted, per mode, so later runs start after it."""
+    __tablename__ = "leaderboard_compaction_state"
+
+    mode = Column(SQLEnum(GameMode), primary_key=True)
+    compacted_through = Column(String)  # "YYYY-MM"
@@ -9,6 +9,7 @@ import os
 from main import app
 from database import get_db, init_db
 from sql_models import Base
+from ratelimit import reset_limiters
 
 # Setup Test DB
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -39,6 +40,7 @@ def init_test_db():
             await conn.run_sync(Base.metadata.create_all)
             
     asyncio.run(run_migrations())
+    reset_limiters()
     yield
     async def drop_tables():
         async with engine.begin() as conn:
@@ -126,3 +128,250 @@ def test_active_games():
     response = client.get("/games/active")
     assert response.status_code == 200
     assert len(response.json()) > 0
+
+def test_read_replica_routing(monkeypatch):
+    import database
+    from sql_models import Leaderboard
+    from models import GameMode
+
+    # A second database standing in for the replica
+    replica_engine = create_async_engine(
+        TEST_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    ReplicaSessionLocal = async_sessionmaker(bind=replica_engine, expire_on_commit=False)
+
+    async def seed_replica():
+        async with replica_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with ReplicaSessionLocal() as session:
+            session.add(Leaderboard(id="r1", username="replica", score=1, mode=GameMode.WALLS))
+            await session.commit()
+
+    asyncio.run(seed_replica())
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", ReplicaSessionLocal)
+    monkeypatch.setattr(database, "recent_writes", database.RecentWrites())
+
+    response = client.get("/leaderboard/")
+    assert [e["username"] for e in response.json()] == ["replica"]
+
+    # A caller that just wrote reads from the primary, other callers still use the replica
+    database.recent_writes.mark(database.token_key("writer-token"))
+    response = client.get("/leaderboard/", headers={"Authorization": "Bearer writer-token"})
+    assert response.json() == []
+    response = client.get("/leaderboard/", headers={"Authorization": "Bearer other-token"})
+    assert [e["username"] for e in response.json()] == ["replica"]
+
+    asyncio.run(replica_engine.dispose())
+
+def test_active_games_compact_encodings():
+    from game_encoding import PACKED_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, decode_packed, unpack_snake
+    from routers.games import active_players_memory
+    import msgpack
+
+    response = client.get("/games/active", headers={"Accept": PACKED_MEDIA_TYPE})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == PACKED_MEDIA_TYPE
+    assert decode_packed(response.content) == active_players_memory
+
+    player = active_players_memory[0]
+    response = client.get(f"/games/active/{player.id}", headers={"Accept": MSGPACK_MEDIA_TYPE})
+    assert response.status_code == 200
+    data = msgpack.unpackb(response.content)
+    assert data["id"] == player.id
+    assert unpack_snake(data["snake"]) == player.snake
+
+    # JSON stays the default
+    response = client.get(f"/games/active/{player.id}")
+    assert response.json()["snake"][0] == {"x": player.snake[0].x, "y": player.snake[0].y}
+
+def test_compact_encodings_skip_games_that_do_not_fit(monkeypatch):
+    from game_encoding import PACKED_MEDIA_TYPE, decode_packed, encode_packed
+    from routers import games
+
+    good = games.active_players_memory[0]
+    long_name = good.model_copy(update={"id": "long-name", "username": "é" * 200})
+    monkeypatch.setattr(games, "active_players_memory", [good, long_name])
+
+    # Never truncated, the encoder refuses and the route leaves the game out
+    with pytest.raises(ValueError):
+        encode_packed([long_name])
+    response = client.get("/games/active", headers={"Accept": PACKED_MEDIA_TYPE})
+    assert decode_packed(response.content) == [good]
+
+    # On its own the game is still served, as JSON
+    response = client.get("/games/active/long-name", headers={"Accept": PACKED_MEDIA_TYPE})
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["username"] == "é" * 200
+
+def test_leaderboard_compaction():
+    from compaction import compact_leaderboard
+    from sql_models import Leaderboard, LeaderboardArchive, LeaderboardRunCount
+    from models import GameMode
+    from datetime import date
+
+    async def run():
+        async with TestingSessionLocal() as session:
+            # Old month: five runs, only the top two survive
+            session.add_all([
+                Leaderboard(id=f"old-{i}", username=f"u{i}", score=i * 10, mode=GameMode.WALLS, date=date(2024, 1, 10 + i))
+                for i in range(5)
+            ])
+            # Recent runs are never touched
+            session.add(Leaderboard(id="recent", username="r", score=1, mode=GameMode.WALLS, date=date(2024, 6, 1)))
+            await session.commit()
+
+        archived = await compact_leaderboard(
+            TestingSessionLocal, retention_days=30, keep_top=2, batch_size=2, today=date(2024, 6, 10)
+        )
+
+        async with TestingSessionLocal() as session:
+            kept = (await session.execute(select(Leaderboard.id).order_by(Leaderboard.id))).scalars().all()
+            moved = (await session.execute(select(LeaderboardArchive.id))).scalars().all()
+            counts = await session.get(LeaderboardRunCount, (GameMode.WALLS, "2024-01"))
+        return archived, kept, moved, counts
+
+    archived, kept, moved, counts = asyncio.run(run())
+    assert archived == 3
+    assert kept == ["old-3", "old-4", "recent"]
+    assert sorted(moved) == ["old-0", "old-1", "old-2"]
+    assert counts.runs == 3
+    assert counts.total_score == 30
+
+def test_active_games_accept_q_values():
+    from routers.games import best_media_type
+    from game_encoding import PACKED_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+    assert best_media_type("") == "application/json"
+    assert best_media_type("*/*") == "application/json"
+    assert best_media_type(f"{PACKED_MEDIA_TYPE}, application/json;q=0.5") == PACKED_MEDIA_TYPE
+    assert best_media_type(f"application/json;q=0.5, {MSGPACK_MEDIA_TYPE}") == MSGPACK_MEDIA_TYPE
+    # q=0 means "not acceptable"
+    assert best_media_type(f"application/json, {MSGPACK_MEDIA_TYPE};q=0") == "application/json"
+    assert best_media_type(f"*/*, {PACKED_MEDIA_TYPE};q=0") == "application/json"
+
+    response = client.get("/games/active", headers={"Accept": f"application/json, {MSGPACK_MEDIA_TYPE};q=0"})
+    assert response.headers["content-type"] == "application/json"
+
+def test_leaderboard_compaction_accumulates_run_counts():
+    from compaction import compact_leaderboard
+    from sql_models import Leaderboard, LeaderboardRunCount
+    from models import GameMode
+    from datetime import date
+
+    async def add_and_compact(prefix, today):
+        async with TestingSessionLocal() as session:
+            session.add_all([
+                Leaderboard(id=f"{prefix}-{i}", username="u", score=5, mode=GameMode.WALLS, date=date(2024, 1, 1))
+                for i in range(3)
+            ])
+            await session.commit()
+        await compact_leaderboard(TestingSessionLocal, retention_days=30, keep_top=0, today=today)
+
+    async def run():
+        # January is still partly inside the window on the first run
+        await add_and_compact("a", date(2024, 2, 15))
+        await add_and_compact("b", date(2024, 6, 1))
+        async with TestingSessionLocal() as session:
+            return await session.get(LeaderboardRunCount, (GameMode.WALLS, "2024-01"))
+
+    counts = asyncio.run(run())
+    assert counts.runs == 6
+    assert counts.total_score == 30
+
+def test_leaderboard_compaction_resumes_after_compacted_months():
+    from compaction import compact_leaderboard
+    from sql_models import Leaderboard, LeaderboardCompactionState
+    from models import GameMode
+    from datetime import date
+
+    async def run():
+        async with TestingSessionLocal() as session:
+            session.add_all([
+                Leaderboard(id=f"jan-{i}", username="u", score=i, mode=GameMode.WALLS, date=date(2024, 1, 5))
+                for i in range(3)
+            ])
+            await session.commit()
+
+        # Mid February: January is not over yet relative to the cutoff, nothing is recorded
+        await compact_leaderboard(TestingSessionLocal, retention_days=30, keep_top=1, today=date(2024, 2, 15))
+        async with TestingSessionLocal() as session:
+            assert await session.get(LeaderboardCompactionState, GameMode.WALLS) is None
+
+        await compact_leaderboard(TestingSessionLocal, retention_days=30, keep_top=1, today=date(2024, 4, 1))
+        async with TestingSessionLocal() as session:
+            # Up to the cutoff month, which is still partly inside the window
+            state = await session.get(LeaderboardCompactionState, GameMode.WALLS)
+            assert state.compacted_through == "2024-02"
+
+            # The kept January row stays the oldest, yet January is no longer scanned
+            session.add(Leaderboard(id="late", username="u", score=0, mode=GameMode.WALLS, date=date(2024, 1, 6)))
+            await session.commit()
+        archived = await compact_leaderboard(TestingSessionLocal, retention_days=30, keep_top=1, today=date(2024, 5, 1))
+
+        async with TestingSessionLocal() as session:
+            return archived, (await session.execute(select(Leaderboard.id).order_by(Leaderboard.id))).scalars().all()
+
+    archived, kept = asyncio.run(run())
+    assert archived == 0
+    assert kept == ["jan-2", "late"]
+
+def test_unique_violation_field():
+    from sqlalchemy.exc import IntegrityError
+    from routers.auth import _unique_violation_field
+
+    class UniqueViolationError(Exception):
+        constraint_name = "ix_users_username"
+
+    # Shaped like SQLAlchemy's asyncpg adapter error, whose cause is the asyncpg exception
+    adapted = Exception('duplicate key value violates unique constraint "ix_users_username"\nDETAIL:  Key (username)=(emailfan) already exists.')
+    adapted.__cause__ = UniqueViolationError()
+    assert _unique_violation_field(IntegrityError("INSERT", {}, adapted)) == "username"
+
+    assert _unique_violation_field(IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: users.email"))) == "email"
+    assert _unique_violation_field(IntegrityError("INSERT", {}, Exception("NOT NULL constraint failed: users.id"))) is None
+
+def test_read_replica_with_two_sqlite_files(tmp_path):
+    # Runs in a fresh interpreter so database.py builds both engines from the environment,
+    # exactly as in a deployment with DATABASE_URL and DATABASE_READ_URL set
+    import subprocess
+    import sys
+    import textwrap
+
+    script = textwrap.dedent("""
+        from fastapi.testclient import TestClient
+        from main import app
+
+        with TestClient(app) as c:
+            # Both files get a schema and seed data, reads go to the replica
+            assert len(c.get("/leaderboard/").json()) == 5
+
+            r = c.post("/auth/signup", json={"username": "new", "email": "new@example.com", "password": "p"})
+            assert r.status_code == 201, r.text
+            headers = {"Authorization": "Bearer " + r.json()["token"]}
+
+            # The new user is only on the primary. Writes authenticate against the primary.
+            r = c.post("/leaderboard/", json={"score": 10, "mode": "walls"}, headers=headers)
+            assert r.status_code == 201, r.text
+
+            # Read routes do use the replica, which has not seen the new user
+            # (read-your-writes pinning is turned off for this run)
+            assert c.get("/auth/me", headers=headers).status_code == 401
+
+            # Everyone else reads the replica, which never received the new score
+            assert all(e["username"] != "new" for e in c.get("/leaderboard/").json())
+    """)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path}/primary.db",
+        "DATABASE_READ_URL": f"sqlite+aiosqlite:///{tmp_path}/replica.db",
+        "GAME_SNAPSHOT_PATH": "",
+        "LEADERBOARD_COMPACTION_INTERVAL": "0",
+        "DATABASE_READ_AFTER_WRITE_SECONDS": "0",
+    }
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=backend_dir, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from main import app
+from ratelimit import TokenBucketLimiter, rejection_counts
+from routers.auth import login_limiter
+
+client = TestClient(app)
+
+def test_token_bucket_refills():
+    limiter = TokenBucketLimiter("test", capacity=2, refill_rate=1)
+
+    assert limiter.acquire("a", now=0) == 0
+    assert limiter.acquire("a", now=0) == 0
+    assert limiter.acquire("a", now=0) == pytest.approx(1)
+
+    # Half a second later half a token is back, still not enough
+    assert limiter.acquire("a", now=0.5) == pytest.approx(0.5)
+    assert limiter.acquire("a", now=1.5) == 0
+
+    # Other keys are independent
+    assert limiter.acquire("b", now=1.5) == 0
+
+def test_token_bucket_bounded_and_evicts_idle_keys():
+    limiter = TokenBucketLimiter("test", capacity=1, refill_rate=1, max_keys=3, idle_ttl=10)
+
+    for i in range(5):
+        limiter.acquire(f"key-{i}", now=i)
+    assert len(limiter) == 3
+
+    # Everything has been idle past the TTL except the newest key
+    limiter.acquire("fresh", now=20)
+    assert len(limiter) == 1
+
+def test_login_rate_limited():
+    login_limiter.reset()
+    before = rejection_counts["auth_login"]
+
+    # An invalid body is rejected with 422 without touching the DB, but still costs a token
+    for _ in range(login_limiter.capacity):
+        response = client.post("/auth/login", json={})
+        assert response.status_code != 429
+
+    response = client.post("/auth/login", json={})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert rejection_counts["auth_login"] == before + 1
+
+    login_limiter.reset()
+
+def test_client_ip_from_trusted_proxy():
+    from starlette.requests import Request
+    from ratelimit import client_ip
+
+    def request(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+    # Without trusted proxies the header is ignored
+    assert client_ip(request("10.0.0.5", "1.2.3.4"), trusted=[]) == "10.0.0.5"
+
+    # Behind a trusted proxy, the first untrusted hop from the right is the client
+    trusted = ["10.0.0.0/8"]
+    assert client_ip(request("10.0.0.5", "6.6.6.6, 1.2.3.4, 10.0.0.7"), trusted=trusted) == "1.2.3.4"
+
+    # An untrusted peer cannot spoof its address
+    assert client_ip(request("5.5.5.5", "1.2.3.4"), trusted=trusted) == "5.5.5.5"
+
+    # "*" trusts a single hop, whatever its address
+    assert client_ip(request("172.16.0.1", "6.6.6.6, 1.2.3.4"), trusted=["*"]) == "1.2.3.4"
+
+def test_route_concurrency_limit(monkeypatch):
+    from routers.auth import password_hashing_limiter
+
+    # Slots are released once the request is done
+    client.post("/auth/login", json={})
+    assert password_hashing_limiter.in_flight == 0
+
+    before = rejection_counts["auth_password_hashing"]
+    monkeypatch.setattr(password_hashing_limiter, "max_concurrent", 0)
+    response = client.post("/auth/login", json={})
+    assert response.status_code == 503
+    assert rejection_counts["auth_password_hashing"] == before + 1
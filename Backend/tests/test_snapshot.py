@@ -0,0 +1,70 @@
+from snapshot import GameSnapshotter, FILE_HEADER, SLOT_HEADER
+from models import ActivePlayer, GameMode, Point, Direction
+
+def make_player(player_id: str, score: int) -> ActivePlayer:
+    return ActivePlayer(
+        id=player_id,
+        username=f"user-{player_id}",
+        score=score,
+        mode=GameMode.PASS_THROUGH,
+        snake=[Point(x=19, y=0), Point(x=18, y=0), Point(x=17, y=0)],
+        food=Point(x=3, y=7),
+        direction=Direction.LEFT,
+    )
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "games.bin")
+    players = [make_player("a", 10), make_player("b", 20)]
+
+    snapshotter = GameSnapshotter(path, max_games=4)
+    snapshotter.open()
+    assert snapshotter.read() == []
+    snapshotter.write(players)
+    snapshotter.close()
+
+    # Survives reopening, as after a restart
+    snapshotter = GameSnapshotter(path, max_games=4)
+    snapshotter.open()
+    assert snapshotter.read() == players
+    snapshotter.close()
+
+def test_torn_snapshot_falls_back_to_previous(tmp_path):
+    snapshotter = GameSnapshotter(str(tmp_path / "games.bin"), max_games=4)
+    snapshotter.open()
+    snapshotter.write([make_player("old", 1)])
+    snapshotter.write([make_player("new", 2)])
+    assert snapshotter.read()[0].id == "new"
+
+    # Corrupt a record in the newest slot, as if the process died mid-write
+    newest = FILE_HEADER.size + snapshotter._slot * snapshotter.slot_size + SLOT_HEADER.size
+    snapshotter._mmap[newest] ^= 0xFF
+    assert [p.id for p in snapshotter.read()] == ["old"]
+
+    snapshotter.close()
+
+def test_snapshot_keeps_full_uuid_and_skips_oversized(tmp_path):
+    import uuid
+
+    player = make_player(str(uuid.uuid4()), 5)
+    player.username = "x" * 60
+    oversized = make_player("y" * 100, 6)
+
+    snapshotter = GameSnapshotter(str(tmp_path / "games.bin"), max_games=4)
+    snapshotter.open()
+    snapshotter.write([player, oversized])
+    assert snapshotter.read() == [player]
+    snapshotter.close()
+
+def test_snapshot_skips_games_that_do_not_fit(tmp_path):
+    good = make_player("good", 1)
+    big_score = make_player("big-score", 2**31)
+    off_board = make_player("off-board", 3)
+    off_board.snake = [Point(x=300, y=0)]
+    negative_food = make_player("negative-food", 4)
+    negative_food.food = Point(x=-1, y=0)
+
+    snapshotter = GameSnapshotter(str(tmp_path / "games.bin"), max_games=8)
+    snapshotter.open()
+    snapshotter.write([big_score, good, off_board, negative_food])
+    assert snapshotter.read() == [good]
+    snapshotter.close()
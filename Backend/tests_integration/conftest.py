@@ -7,6 +7,7 @@ from sqlalchemy.pool import StaticPool
 
 from main import app
 from database import get_db
+from ratelimit import reset_limiters
 from sql_models import Base
 
 # Use in-memory SQLite for tests, but configured to allow sharing across threads/connections
@@ -53,6 +54,9 @@ async def db_session(test_engine):
 
 @pytest.fixture
 async def client(db_session):
+    # All requests come from the same address, start each test with full buckets
+    reset_limiters()
+
     async def override_get_db():
         yield db_session
 
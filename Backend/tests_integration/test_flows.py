@@ -161,3 +161,65 @@ async def test_auth_edge_cases(client):
     # Submit without token
     resp = await client.post("/leaderboard/", json={"score": 100, "mode": "walls"})
     assert resp.status_code == 401
+
+@pytest.mark.asyncio
+async def test_bulk_export_import(client, monkeypatch):
+    """Round trip leaderboard rows through the admin export/import endpoints"""
+    from routers import admin
+    import json
+
+    resp = await client.post("/auth/signup", json={"username": "bulkadmin", "email": "bulk@t.com", "password": "pass"})
+    headers = {"Authorization": f"Bearer {resp.json()['token']}"}
+    for score in (10, 20, 30):
+        await client.post("/leaderboard/", json={"score": score, "mode": "walls"}, headers=headers)
+
+    # Non-admins are rejected
+    resp = await client.get("/admin/export/leaderboard", headers=headers)
+    assert resp.status_code == 403
+
+    monkeypatch.setattr(admin, "ADMIN_USERNAMES", {"bulkadmin"})
+
+    resp = await client.get("/admin/export/leaderboard", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    mine = [r for r in rows if r["username"] == "bulkadmin"]
+    assert sorted(r["score"] for r in mine) == [10, 20, 30]
+
+    # Re-import under new ids, resuming past the first row as if it was already loaded
+    body = "".join(json.dumps({**r, "id": f"copy-{r['id']}"}) + "\n" for r in mine)
+    resp = await client.post("/admin/import/leaderboard?skip=1", content=body, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["imported"] == 3
+
+    resp = await client.get("/admin/export/leaderboard?format=csv", headers=headers)
+    assert resp.status_code == 200
+    lines = resp.text.splitlines()
+    assert lines[0] == "id,username,score,mode,date"
+    copies = [line for line in lines if line.startswith("copy-")]
+    assert len(copies) == 2
+    assert all(",walls," in line for line in copies)
+
+@pytest.mark.asyncio
+async def test_signup_duplicate_username(client):
+    """Duplicate usernames are rejected by the unique index"""
+    resp = await client.post("/auth/signup", json={"username": "dupname", "email": "dup1@test.com", "password": "pass"})
+    assert resp.status_code == 201
+
+    resp = await client.post("/auth/signup", json={"username": "dupname", "email": "dup2@test.com", "password": "pass"})
+    assert resp.status_code == 400
+    assert "Username already taken" in resp.json()["detail"]
+
+    # The session is still usable after the failed insert
+    resp = await client.post("/auth/signup", json={"username": "dupname2", "email": "dup2@test.com", "password": "pass"})
+    assert resp.status_code == 201
+
+@pytest.mark.asyncio
+async def test_signup_duplicate_username_containing_email(client):
+    """The error message follows the violated constraint, not the conflicting value"""
+    resp = await client.post("/auth/signup", json={"username": "emailfan", "email": "fan1@test.com", "password": "pass"})
+    assert resp.status_code == 201
+
+    resp = await client.post("/auth/signup", json={"username": "emailfan", "email": "fan2@test.com", "password": "pass"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Username already taken"
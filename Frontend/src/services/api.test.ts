@@ -1,5 +1,5 @@
 import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
-import { authApi, leaderboardApi, gamesApi } from './api';
+import { authApi, leaderboardApi, gamesApi, PACKED_MEDIA_TYPE } from './api';
 
 // Mock global fetch
 const fetchMock = vi.fn();
@@ -68,11 +68,42 @@ describe('API Service Client', () => {
       it('should fetch active players', async () => {
         fetchMock.mockResolvedValueOnce({
           ok: true,
+          headers: new Headers({ 'Content-Type': 'application/json' }),
           json: async () => ([]),
         });
 
         await gamesApi.getActivePlayers();
-        expect(fetchMock).toHaveBeenCalledWith('http://localhost:8000/games/active');
+        expect(fetchMock).toHaveBeenCalledWith('http://localhost:8000/games/active', expect.any(Object));
+      });
+
+      it('should decode the packed binary form', async () => {
+        // 1 player: id "p", username "ab", score 340, walls, right, food (15, 12), snake (10, 10), (9, 10)
+        const bytes = new Uint8Array([
+          1, 0,
+          1, 0x70,
+          2, 0x61, 0x62,
+          0x54, 0x01, 0, 0,
+          1, 3,
+          0xff, 0,
+          2, 0,
+          0xd2, 0, 0xd1, 0,
+        ]);
+        fetchMock.mockResolvedValueOnce({
+          ok: true,
+          headers: new Headers({ 'Content-Type': PACKED_MEDIA_TYPE }),
+          arrayBuffer: async () => bytes.buffer,
+        });
+
+        const players = await gamesApi.getActivePlayers();
+        expect(players).toEqual([{
+          id: 'p',
+          username: 'ab',
+          score: 340,
+          mode: 'walls',
+          direction: 'right',
+          food: { x: 15, y: 12 },
+          snake: [{ x: 10, y: 10 }, { x: 9, y: 10 }],
+        }]);
       });
     });
   });
@@ -1,3 +1,5 @@
+import { GRID_SIZE } from '@/game/snakeLogic';
+
 export interface User {
   id: string;
   username: string;
@@ -122,18 +124,75 @@ export const leaderboardApi = {
   },
 };
 
+// Compact binary form of active games, see Backend/game_encoding.py for the layout.
+// Snakes are sent as little-endian u16 cell indices (y * GRID_SIZE + x).
+export const PACKED_MEDIA_TYPE = 'application/x-snake-packed';
+const MODES: ActivePlayer['mode'][] = ['pass-through', 'walls'];
+const DIRECTIONS: ActivePlayer['direction'][] = ['up', 'down', 'left', 'right'];
+
+const toPoint = (cell: number) => ({ x: cell % GRID_SIZE, y: Math.floor(cell / GRID_SIZE) });
+
+export const decodePackedPlayers = (buffer: ArrayBuffer): ActivePlayer[] => {
+  const view = new DataView(buffer);
+  const text = new TextDecoder();
+  let offset = 0;
+
+  const readText = () => {
+    const length = view.getUint8(offset);
+    const value = text.decode(new Uint8Array(buffer, offset + 1, length));
+    offset += 1 + length;
+    return value;
+  };
+
+  const count = view.getUint16(offset, true);
+  offset += 2;
+
+  const players: ActivePlayer[] = [];
+  for (let i = 0; i < count; i++) {
+    const id = readText();
+    const username = readText();
+    const score = view.getInt32(offset, true);
+    const mode = MODES[view.getUint8(offset + 4)];
+    const direction = DIRECTIONS[view.getUint8(offset + 5)];
+    const food = toPoint(view.getUint16(offset + 6, true));
+    const snakeLength = view.getUint16(offset + 8, true);
+    offset += 10;
+
+    const snake = [];
+    for (let j = 0; j < snakeLength; j++) {
+      snake.push(toPoint(view.getUint16(offset, true)));
+      offset += 2;
+    }
+    players.push({ id, username, score, mode, snake, food, direction });
+  }
+  return players;
+};
+
+const readPlayers = async (response: Response): Promise<ActivePlayer[]> => {
+  if (response.headers.get('Content-Type')?.startsWith(PACKED_MEDIA_TYPE)) {
+    return decodePackedPlayers(await response.arrayBuffer());
+  }
+  const data = await response.json();
+  return Array.isArray(data) ? data : [data];
+};
+
 // Active games API (for spectator mode)
 export const gamesApi = {
   async getActivePlayers(): Promise<ActivePlayer[]> {
-    const response = await fetch(`${API_Base}/games/active`);
+    const response = await fetch(`${API_Base}/games/active`, {
+      headers: { Accept: `${PACKED_MEDIA_TYPE}, application/json;q=0.5` },
+    });
     if (!response.ok) return [];
-    return await response.json();
+    return await readPlayers(response);
   },
 
   async watchPlayer(playerId: string): Promise<ActivePlayer | null> {
-    const response = await fetch(`${API_Base}/games/active/${playerId}`);
+    const response = await fetch(`${API_Base}/games/active/${playerId}`, {
+      headers: { Accept: `${PACKED_MEDIA_TYPE}, application/json;q=0.5` },
+    });
     if (!response.ok) return null;
-    return await response.json();
+    const players = await readPlayers(response);
+    return players[0] ?? null;
   },
 
   async updateGameState(token: string, state: Omit<ActivePlayer, 'id' | 'username'>): Promise<void> {